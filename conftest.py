@@ -0,0 +1,241 @@
+"""Shared pytest fixtures for the vup-core test suite.
+
+Pins the location of the vup-core script and a throwaway home directory once
+per session, and provides the run() helper that invokes vup-core. By default
+run() calls vup-core's main() in-process; set VUP_USE_SUBPROCESS=1 to spawn it
+as a subprocess the way the vup shell function does. Tests are independent of
+each other (each works in its own temporary directory), so the suite can be
+parallelized with pytest-xdist:
+
+    pytest -n auto
+"""
+
+import contextlib
+import importlib.machinery
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+
+# Disk space taken by one real venv from 'python -m venv' (about 26 MB,
+# rounded up)
+VENV_SIZE = 30 * 1024 * 1024
+
+
+def tmpfs_space_needed():
+    """Return the bytes the whole test run may need in the fake home at peak.
+
+    With the default stub backend, each worker builds only one real venv
+    (test_new_creates_venv). With any other VUP_VENV_BACKEND every venv is
+    real, and a worker can hold three at once: prebuilt_venv, a
+    prebuilt_venv_copy, and the extra venv from test_ls_lists_venvs. All
+    xdist workers share /dev/shm and check it before any of them has
+    written, so the need is multiplied by the worker count.
+    """
+    real_venvs = os.environ.get("VUP_VENV_BACKEND", "stub") != "stub"
+    venvs_per_worker = 3 if real_venvs else 1
+    workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    return venvs_per_worker * VENV_SIZE * workers
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "slow: builds a real venv (deselect with -m 'not slow')"
+    )
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    """Temporarily change the working directory to path (no-op if None)."""
+    if path is None:
+        yield
+        return
+    old_cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old_cwd)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_venv_backend():
+    """Make 'vup new' create stub venvs (just bin/activate) by default.
+
+    Tests only check venv layout, so running 'python -m venv' (interpreter
+    copy plus pip bootstrap) for every created venv is wasted time. Tests
+    that need a real venv pass VUP_VENV_BACKEND=venv explicitly. An existing
+    VUP_VENV_BACKEND in the environment is left alone, so the whole suite can
+    be run against real venvs with VUP_VENV_BACKEND=venv.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        if "VUP_VENV_BACKEND" not in os.environ:
+            mp.setenv("VUP_VENV_BACKEND", "stub")
+        yield
+
+
+@pytest.fixture(scope="session")
+def script():
+    """Path to the vup-core script under test."""
+    return Path(__file__).parent / "vup-core"
+
+
+@pytest.fixture(scope="session")
+def home():
+    """A throwaway home directory, which vup-core treats as the search root.
+
+    HOME is pointed at a fresh directory for the whole session, so tests never
+    touch (or see venvs in) the real home directory. The directory is placed
+    on tmpfs (/dev/shm) when it is writable and has room for the whole run
+    (see tmpfs_space_needed()), since init/new tests are dominated by small
+    file writes; otherwise it goes in the default temp directory.
+    """
+    shm = Path("/dev/shm")
+    use_shm = (shm.is_dir() and os.access(shm, os.W_OK)
+               and shutil.disk_usage(shm).free >= tmpfs_space_needed())
+    parent = shm if use_shm else None
+    with tempfile.TemporaryDirectory(prefix="vup-tests-", dir=parent) as d, \
+            pytest.MonkeyPatch.context() as mp:
+        # Resolve symlinks (e.g. /tmp on macOS) so paths compare equal to the
+        # resolved paths vup-core works with
+        fake_home = Path(d).resolve()
+        mp.setenv("HOME", str(fake_home))
+        yield fake_home
+
+
+@pytest.fixture(scope="session")
+def vup_core(script, home):
+    """vup-core loaded as a module, so main(argv) can be called in-process.
+
+    Loaded once per session; the script has no .py suffix, so it needs an
+    explicit SourceFileLoader. Depends on home because vup-core reads HOME
+    at import time.
+    """
+    loader = importlib.machinery.SourceFileLoader("vup_core", str(script))
+    spec = importlib.util.spec_from_loader("vup_core", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def run_cli(script, home):
+    """Return a helper that runs vup-core as a subprocess.
+
+    This is how the vup shell function calls vup-core, so tests that verify
+    real CLI behavior (shebang, exit status) use it directly. It merges any
+    provided environment variables with the current environment; without
+    overrides the child simply inherits os.environ, skipping the copy.
+
+    Helper args:
+        args: List of command-line arguments to pass to vup-core.
+        cwd: Working directory for the subprocess (default: current directory).
+        env: Additional environment variables to set (merged with os.environ).
+
+    Helper returns:
+        Tuple of (returncode, stdout, stderr) from the subprocess.
+    """
+    def _run_cli(args, cwd=None, env=None):
+        # cwd is switched in the parent rather than passed to subprocess.run:
+        # CPython only takes its posix_spawn fast path when cwd is None (and
+        # close_fds is False), otherwise it falls back to fork+exec
+        with working_directory(cwd):
+            result = subprocess.run(
+                [str(script)] + args,
+                capture_output=True,
+                # Decode explicitly rather than via the locale (text=True), so
+                # results don't depend on the CI machine's locale settings
+                encoding="utf-8",
+                env=None if env is None else {**os.environ, **env},
+                # Nothing sensitive to leak (fds are non-inheritable by default
+                # since PEP 446), and skipping the close-all-fds step is cheaper
+                close_fds=False
+            )
+        return result.returncode, result.stdout, result.stderr
+
+    return _run_cli
+
+
+@pytest.fixture(scope="session")
+def run(vup_core, run_cli):
+    """Return a helper that runs vup-core with the given arguments.
+
+    The helper calls vup-core's main(argv) in-process, which avoids paying for
+    a fork+exec and interpreter startup on every call. The working directory
+    and environment are switched for the duration of the call, stdout and
+    stderr are captured, and SystemExit (e.g. from argparse) is turned into an
+    exit code. Set VUP_USE_SUBPROCESS=1 to run every call through run_cli
+    instead.
+
+    Helper args and return value are the same as run_cli.
+    """
+    if os.environ.get("VUP_USE_SUBPROCESS") == "1":
+        return run_cli
+
+    def _run(args, cwd=None, env=None):
+        out, err = io.StringIO(), io.StringIO()
+        with working_directory(cwd), \
+                mock.patch.dict(os.environ, env or {}), \
+                contextlib.redirect_stdout(out), \
+                contextlib.redirect_stderr(err):
+            try:
+                code = vup_core.main(args)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        return code, out.getvalue(), err.getvalue()
+
+    return _run
+
+
+@pytest.fixture(scope="session")
+def workdir_pool():
+    """Emptied working directories waiting to be reused by workdir."""
+    return []
+
+
+@pytest.fixture
+def workdir(home, workdir_pool):
+    """An empty directory under home for a single test to work in.
+
+    Rather than creating and removing a fresh directory for every test, used
+    directories are emptied and recycled through workdir_pool. Whatever is
+    left in the pool is removed along with home at the end of the session.
+    """
+    path = workdir_pool.pop() if workdir_pool else Path(tempfile.mkdtemp(dir=home))
+    yield path
+    for entry in path.iterdir():
+        if entry.is_dir() and not entry.is_symlink():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    workdir_pool.append(path)
+
+
+@pytest.fixture(scope="session")
+def prebuilt_venv(run, home):
+    """A directory under home with .venv/testvenv already built by 'vup new'.
+
+    Creating a venv is by far the most expensive operation in the suite, so
+    it is done once per session (once per worker under pytest-xdist) and
+    shared. Tests must treat this directory as read-only; tests that modify
+    it should use prebuilt_venv_copy instead.
+    """
+    with tempfile.TemporaryDirectory(dir=home) as d:
+        run(["init"], cwd=d)
+        code, out, err = run(["new", "testvenv"], cwd=d)
+        assert code == 0, f"building shared venv failed: {err}"
+        yield Path(d)
+
+
+@pytest.fixture
+def prebuilt_venv_copy(prebuilt_venv, workdir):
+    """A private, writable copy of prebuilt_venv for a single test."""
+    shutil.copytree(prebuilt_venv, workdir, symlinks=True, dirs_exist_ok=True)
+    return workdir
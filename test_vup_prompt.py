@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Tests for the vup-core prompt subcommand.
+
+The prompt subcommand only formats a venv path into a prompt identifier, so
+these tests need no filesystem state and no venv fixtures. Keeping them apart
+from test_vup_core.py gives a near-instant feedback loop when working on
+prompt formatting.
+
+Run with: pytest test_vup_prompt.py  (or ./test_vup_prompt.py)
+"""
+
+import sys
+
+import pytest
+
+
+def test_prompt_home_venv(run, home):
+    """Test that prompt generates '~/name' format for home directory venvs.
+
+    Passes a path like ~/.venv/test to the prompt command and verifies
+    that it outputs '~/test' (using ~ to indicate the home directory).
+    """
+    venv_path = home / ".venv" / "test"
+    code, out, err = run(["prompt", str(venv_path)])
+    assert code == 0
+    assert out.strip() == "~/test"
+
+
+def test_prompt_project_venv(run, home):
+    """Test that prompt generates 'project/name' format for project venvs.
+
+    Passes a path like ~/myproject/.venv/dev to the prompt command and
+    verifies that it outputs 'myproject/dev' (using the project directory
+    name, not the full path).
+    """
+    venv_path = home / "myproject" / ".venv" / "dev"
+    code, out, err = run(["prompt", str(venv_path)])
+    assert code == 0
+    assert out.strip() == "myproject/dev"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__] + sys.argv[1:]))